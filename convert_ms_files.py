@@ -1,148 +1,354 @@
+import argparse
+import functools
 import os
+import subprocess
 import sys
-
-import comtypes.client
-
-
-def convert_pptx_to_pdf(input_file_path, output_file_path=None):
-    """
-    Converts a PowerPoint .pptx file to a .pdf file.
-    ...
+from abc import ABC, abstractmethod
+
+try:
+    import comtypes
+    import comtypes.client
+except ImportError:
+    # comtypes only works on Windows; the soffice backend doesn't need it
+    comtypes = None
+
+# --- Conversion backend ---
+# "comtypes" drives Microsoft Office over COM (Windows only).
+# "soffice" converts everything in one LibreOffice headless run.
+PDF_BACKEND = os.environ.get("PDF_BACKEND", "comtypes").lower()
+SOFFICE = os.environ.get("SOFFICE", "soffice")
+
+# HRESULTs meaning the Office server process has died or dropped the
+# connection; the application must be recreated before it can be used again.
+RPC_E_DISCONNECTED = 0x80010108
+RPC_S_SERVER_UNAVAILABLE = 0x800706BA
+RPC_S_CALL_FAILED = 0x800706BE
+FATAL_COM_HRESULTS = (
+    RPC_E_DISCONNECTED,
+    RPC_S_SERVER_UNAVAILABLE,
+    RPC_S_CALL_FAILED,
+)
+
+# --- Type libraries (GUID, major, minor) ---
+# Generating comtypes wrappers for these lets PowerPoint/Excel be called
+# through early-bound interfaces instead of IDispatch name lookups.
+POWERPOINT_TYPELIB = ("{91493440-5A91-11CF-8700-00AA0060263B}", 2, 12)
+EXCEL_TYPELIB = ("{00020813-0000-0000-C000-000000000046}", 1, 9)
+
+
+@functools.cache
+def _load_type_library(typelib):
     """
+    Generates (or loads the cached) comtypes wrapper module for a type library.
+    Only called when a converter starts, and only once per type library.
 
-    # --- PowerPoint constants ---
-    # From https://learn.microsoft.com/en-us/office/vba/api/powerpoint.ppsaveasfiletype
-    ppFormatPDF = 32
+    Returns None if the type library is not registered, e.g. a different
+    Office version is installed; callers then fall back to late binding.
+    """
+    try:
+        return comtypes.client.GetModule(typelib)
+    except Exception as e:
+        print(f"Could not load type library {typelib[0]}; using late binding: {e}")
+        return None
 
-    # ... (Path handling logic remains the same) ...
-    if not os.path.isabs(input_file_path):
-        input_file_path = os.path.abspath(input_file_path)
 
-    if output_file_path is None:
-        file_name, _ = os.path.splitext(input_file_path)
-        output_file_path = file_name + ".pdf"
-    elif not os.path.isabs(output_file_path):
-        output_file_path = os.path.abspath(output_file_path)
+def _is_fatal_com_error(error):
+    """Returns True if the COM error means the Office application is gone."""
+    hresult = getattr(error, "hresult", None)
+    if hresult is None:
+        return False
+    return (hresult & 0xFFFFFFFF) in FATAL_COM_HRESULTS
 
-    output_dir = os.path.dirname(output_file_path)
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
 
-    powerpoint = None
-    deck = None
+class _OfficeConverter(ABC):
+    """
+    Base class for converters that keep a single Office application running
+    for a whole batch of files, instead of starting one per file.
 
-    try:
-        powerpoint = comtypes.client.CreateObject("PowerPoint.Application")
-        powerpoint.Visible = True
+    Subclasses set `prog_id` / `app_name` / `typelib`, list the constants to
+    take from the type library in `typelib_constants` (the class attributes
+    hold the documented values used with late binding) and implement `_export`.
 
-        print(f"Opening presentation: {input_file_path}")
-        deck = powerpoint.Presentations.Open(input_file_path, WithWindow=False)
+    Args:
+        debug (bool): Show the application window and its alert dialogs
+                      instead of running headless.
+    """
 
-        print(f"Saving PDF to: {output_file_path}")
-        deck.SaveAs(output_file_path, ppFormatPDF)
+    prog_id = None
+    app_name = None
+    typelib = None
+    typelib_constants = ()
+
+    def __init__(self, debug=False):
+        self.debug = debug
+        self.app = None
+        # If this fails, convert() tries again for each file
+        self._try_start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.quit()
+
+    def _start(self):
+        interface = None
+        module = _load_type_library(self.typelib)
+        if module is not None:
+            interface = module._Application
+            for name in self.typelib_constants:
+                setattr(self, name, getattr(module, name))
+
+        self.app = comtypes.client.CreateObject(self.prog_id, interface=interface)
+        self._configure_app()
+        print(f"Started {self.app_name} application.")
+
+    def _try_start(self):
+        """Starts the application, logging instead of raising on failure."""
+        try:
+            self._start()
+            return True
+        except Exception as e:
+            print(f"Failed to start {self.app_name}: {e}")
+            # Don't keep a half-configured application around
+            self.quit()
+            return False
+
+    def _configure_app(self):
+        pass
+
+    @abstractmethod
+    def _export(self, input_file_path, output_file_path):
+        """Opens the input with `self.app` and saves it as a PDF."""
+
+    def convert(self, input_file_path, output_file_path=None):
+        """
+        Converts a single file to .pdf using the running application.
+
+        Args:
+            input_file_path (str): The path to the input file.
+            output_file_path (str, optional): The path for the output .pdf.
+                                             If None, it saves the PDF in the
+                                             same directory as the input file
+                                             with the same name.
+
+        Returns:
+            bool: True if the conversion succeeded, False otherwise.
+        """
+
+        # --- Path handling ---
+        if not os.path.isabs(input_file_path):
+            input_file_path = os.path.abspath(input_file_path)
+
+        if output_file_path is None:
+            file_name, _ = os.path.splitext(input_file_path)
+            output_file_path = file_name + ".pdf"
+        elif not os.path.isabs(output_file_path):
+            output_file_path = os.path.abspath(output_file_path)
+
+        output_dir = os.path.dirname(output_file_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+
+        if self.app is None and not self._try_start():
+            # An earlier start failed and so did this retry
+            print(f"Skipping '{input_file_path}'; {self.app_name} is not running.")
+            return False
+
+        try:
+            self._export(input_file_path, output_file_path)
+            print("Conversion successful.")
+            return True
+
+        except Exception as e:
+            print(f"An error occurred during {self.app_name} conversion:")
+            print(str(e))
+
+            # One bad file shouldn't kill the whole batch, but if the
+            # application itself went away, start a fresh one.
+            if _is_fatal_com_error(e):
+                self._restart()
+            return False
+
+    def _restart(self):
+        print(f"Restarting {self.app_name} application.")
+        # The old instance is most likely gone, but try to shut it down anyway
+        self.quit()
+        self._try_start()
+
+    def quit(self):
+        if self.app:
+            try:
+                self.app.Quit()
+                print(f"Quit {self.app_name} application.")
+            except Exception as e:
+                print(f"An error occurred while quitting {self.app_name}: {e}")
+        self.app = None
+
+
+class PPTConverter(_OfficeConverter):
+    """
+    Converts PowerPoint .pptx/.ppt files to .pdf files.
+    """
 
-        print("Conversion successful.")
+    prog_id = "PowerPoint.Application"
+    app_name = "PowerPoint"
+    typelib = POWERPOINT_TYPELIB
+    typelib_constants = ("ppSaveAsPDF", "ppAlertsNone")
 
-    except Exception as e:
-        print(f"An error occurred during PowerPoint conversion:")
-        print(str(e))
-
-    finally:
-        if deck:
+    # --- PowerPoint constants ---
+    # From https://learn.microsoft.com/en-us/office/vba/api/powerpoint.ppsaveasfiletype
+    ppSaveAsPDF = 32
+    # From https://learn.microsoft.com/en-us/office/vba/api/powerpoint.ppalertlevel
+    ppAlertsNone = 1
+    # From https://learn.microsoft.com/en-us/office/vba/api/office.msotristate
+    msoTrue = -1
+    msoFalse = 0
+
+    def _configure_app(self):
+        # PowerPoint refuses `Visible = False` ("Hiding the application window
+        # is not allowed"), so it is only touched in debug mode; opening
+        # presentations with WithWindow=False keeps it from drawing anything.
+        if self.debug:
+            self.app.Visible = self.msoTrue
+        else:
+            self.app.DisplayAlerts = self.ppAlertsNone
+
+    def _export(self, input_file_path, output_file_path):
+        print(f"Opening presentation: {input_file_path}")
+        with_window = self.msoTrue if self.debug else self.msoFalse
+        deck = self.app.Presentations.Open(input_file_path, WithWindow=with_window)
+        try:
+            print(f"Saving PDF to: {output_file_path}")
+            deck.SaveAs(output_file_path, self.ppSaveAsPDF)
+        finally:
             deck.Close()
             print("Closed presentation.")
-        if powerpoint:
-            powerpoint.Quit()
-            print("Quit PowerPoint application.")
 
-        deck = None
-        powerpoint = None
-        # comtypes.CoUninitialize() # <-- REMOVED (Called ONCE at the end)
 
-
-def convert_xlsx_to_pdf(input_file_path, output_file_path=None):
+class XLSConverter(_OfficeConverter):
     """
-    Converts an Excel .xlsx file to a .pdf file.
-
-    Args:
-        input_file_path (str): The absolute path to the input .xlsx file.
-        output_file_path (str, optional): The absolute path for the output .pdf.
-                                         If None, it saves the PDF in the same
-                                         directory as the input file with the
-                                         same name.
+    Converts Excel .xlsx/.xls files to .pdf files.
     """
 
+    prog_id = "Excel.Application"
+    app_name = "Excel"
+    typelib = EXCEL_TYPELIB
+    typelib_constants = ("xlTypePDF",)
+
     # --- Excel constants ---
     # From https://learn.microsoft.com/en-us/office/vba/api/excel.xlfixedformattype
     xlTypePDF = 0
 
-    # --- Path handling ---
-    if not os.path.isabs(input_file_path):
-        input_file_path = os.path.abspath(input_file_path)
+    def _configure_app(self):
+        # No window or dialogs needed for batch conversion
+        self.app.Visible = self.debug
+        self.app.DisplayAlerts = self.debug
 
-    if output_file_path is None:
-        file_name, _ = os.path.splitext(input_file_path)
-        output_file_path = file_name + ".pdf"
-    elif not os.path.isabs(output_file_path):
-        output_file_path = os.path.abspath(output_file_path)
+    def _export(self, input_file_path, output_file_path):
+        print(f"Opening workbook: {input_file_path}")
+        workbook = self.app.Workbooks.Open(input_file_path)
+        try:
+            print(f"Saving PDF to: {output_file_path}")
+
+            # Export as PDF
+            # Signature: ExportAsFixedFormat(Type, Filename, Quality, IncludeDocProperties, IgnorePrintAreas)
+            workbook.ExportAsFixedFormat(self.xlTypePDF, output_file_path)
+        finally:
+            # Do not save changes to the original file
+            workbook.Close(SaveChanges=False)
+            print("Closed workbook.")
 
-    output_dir = os.path.dirname(output_file_path)
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
 
-    excel = None
-    workbook = None
+def convert_files(converter_class, input_file_paths, debug=False):
+    """
+    Converts a batch of files with a single application instance.
 
-    try:
-        # Start the Excel application
-        excel = comtypes.client.CreateObject("Excel.Application")
-        # Set visibility to True, similar to the PowerPoint fix
-        excel.Visible = True
+    Args:
+        converter_class (type): PPTConverter or XLSConverter.
+        input_file_paths (list[str]): Absolute paths of the files to convert.
+        debug (bool, optional): Show the application while converting.
 
-        print(f"Opening workbook: {input_file_path}")
+    Returns:
+        int: The number of files converted successfully.
+    """
 
-        # Open the workbook
-        workbook = excel.Workbooks.Open(input_file_path)
+    if not input_file_paths:
+        return 0
 
-        print(f"Saving PDF to: {output_file_path}")
+    converted_count = 0
+    with converter_class(debug=debug) as converter:
+        for input_file_path in input_file_paths:
+            print("---")  # Separator for clarity
+            # Pass None so the converter creates the default output name
+            if converter.convert(input_file_path, None):
+                converted_count += 1
+    return converted_count
 
-        # Export as PDF
-        # Signature: ExportAsFixedFormat(Type, Filename, Quality, IncludeDocProperties, IgnorePrintAreas)
-        workbook.ExportAsFixedFormat(xlTypePDF, output_file_path)
 
-        print("Conversion successful.")
+def convert_files_via_soffice(input_file_paths, output_dir):
+    """
+    Converts a batch of files with a single LibreOffice headless invocation,
+    so LibreOffice only has to start once for the whole batch.
 
-    except Exception as e:
-        print(f"An error occurred during Excel conversion:")
-        print(str(e))
+    Args:
+        input_file_paths (list[str]): Absolute paths of the files to convert.
+        output_dir (str): Directory the .pdf files are written to.
 
-    finally:
-        # Always close the workbook and quit Excel
-        if workbook:
-            workbook.Close(
-                SaveChanges=False
-            )  # Do not save changes to the original file
-            print("Closed workbook.")
-        if excel:
-            excel.Quit()
-            print("Quit Excel application.")
+    Returns:
+        int: The number of files converted successfully.
+    """
 
-        # Clean up COM references
-        workbook = None
-        excel = None
-        # comtypes.CoUninitialize() # <-- REMOVED (Called ONCE at the end)
+    if not input_file_paths:
+        return 0
 
+    print("---")
+    print(f"Converting {len(input_file_paths)} file(s) with LibreOffice...")
+    try:
+        subprocess.run(
+            [
+                SOFFICE,
+                "--headless",
+                "--convert-to",
+                "pdf",
+                "--outdir",
+                output_dir,
+                *input_file_paths,
+            ],
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError) as e:
+        print("An error occurred during LibreOffice conversion:")
+        print(str(e))
+
+    # LibreOffice keeps going past bad files, so check what was produced
+    converted_count = 0
+    for input_file_path in input_file_paths:
+        file_name, _ = os.path.splitext(os.path.basename(input_file_path))
+        if os.path.exists(os.path.join(output_dir, file_name + ".pdf")):
+            converted_count += 1
+        else:
+            print(f"Failed to convert '{input_file_path}'.")
+    return converted_count
 
-def main():
+
+def main(debug=False):
     """
     Main function to find and convert all .pptx/.ppt and .xlsx/.xls files
     in the current directory. Skips files that have already been converted.
+
+    Args:
+        debug (bool, optional): Show the Office applications while converting.
     """
 
     print(f"Scanning for presentations and spreadsheets in: {os.getcwd()}")
 
-    converted_count = 0
     skipped_count = 0
+    powerpoint_files = []
+    excel_files = []
+    # Output names already claimed by an earlier file in this run, so that
+    # e.g. foo.pptx and foo.xlsx don't both get converted to foo.pdf
+    planned_pdf_names = set()
 
     for file in os.listdir():
         # Determine file name and extension
@@ -162,41 +368,75 @@ def main():
             print(f"Skipping '{file}'; PDF '{pdf_output_name}' already exists.")
             skipped_count += 1
             continue  # Skip to the next file
+
+        if os.path.normcase(pdf_output_name) in planned_pdf_names:
+            print(
+                f"Skipping '{file}'; PDF '{pdf_output_name}' will already be "
+                "created from another file."
+            )
+            skipped_count += 1
+            continue
+        planned_pdf_names.add(os.path.normcase(pdf_output_name))
         # -----------------------------------------
 
         # Get absolute path for the file (only if we're converting)
         abs_input_path = os.path.abspath(file)
 
-        # Check for PowerPoint files
         if is_powerpoint:
-            print("---")  # Separator for clarity
-            # Pass None so the function creates the default output name
-            convert_pptx_to_pdf(abs_input_path, None)
-            converted_count += 1
+            powerpoint_files.append(abs_input_path)
+        else:
+            excel_files.append(abs_input_path)
 
-        # Check for Excel files
-        elif is_excel:
-            print("---")  # Separator for clarity
-            # Pass None so the function creates the default output name
-            convert_xlsx_to_pdf(abs_input_path, None)
-            converted_count += 1
+    if PDF_BACKEND == "soffice":
+        converted_count = convert_files_via_soffice(
+            powerpoint_files + excel_files, os.getcwd()
+        )
+    else:
+        # One application instance per file type, reused for the whole batch
+        converted_count = convert_files(PPTConverter, powerpoint_files, debug)
+        converted_count += convert_files(XLSConverter, excel_files, debug)
+    failed_count = len(powerpoint_files) + len(excel_files) - converted_count
 
     print("---")
-    if converted_count == 0 and skipped_count == 0:
+    if not (powerpoint_files or excel_files) and skipped_count == 0:
         print("No .pptx, .ppt, .xlsx, or .xls files found to convert.")
     else:
         print(
-            f"Finished. Converted {converted_count} file(s), skipped {skipped_count} existing file(s)."
+            f"Finished. Converted {converted_count} file(s), failed {failed_count}, "
+            f"skipped {skipped_count} file(s)."
         )
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Convert PowerPoint and Excel files in the current directory to PDF"
+    )
+    parser.add_argument(
+        "--debug",
+        action="store_true",
+        help="show the Office applications and their alerts while converting",
+    )
+    args = parser.parse_args()
+
+    if PDF_BACKEND not in ("comtypes", "soffice"):
+        print(f"Unknown PDF_BACKEND '{PDF_BACKEND}'; use 'comtypes' or 'soffice'.")
+        sys.exit(1)
+
+    if PDF_BACKEND == "soffice":
+        # LibreOffice runs as a separate process; no COM setup needed
+        main()
+        sys.exit(0)
+
+    if comtypes is None:
+        print("comtypes is not installed; set PDF_BACKEND=soffice to use LibreOffice.")
+        sys.exit(1)
+
     # Initialize the COM library for this thread
     is_com_initialized = False
     try:
         comtypes.CoInitialize()
         is_com_initialized = True
-        main()
+        main(debug=args.debug)
     except Exception as e:
         print(f"An error occurred: {e}")
         # Check if it's the main init that failed
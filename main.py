@@ -1,16 +1,110 @@
+import io
+import json
+import mmap
 import os
+from contextlib import ExitStack
 from pathlib import Path
 
 from pypdf import PdfReader, PdfWriter
 
+# pypdf writes the output in many small chunks; a large buffer coalesces them
+OUTPUT_BUFFER_SIZE = 4 * 1024 * 1024
+
+# Outputs expected to be smaller than this are rendered in memory and written
+# to disk in a few large writes; bigger ones go through the buffered file
+IN_MEMORY_WRITE_LIMIT = 256 * 1024 * 1024
+WRITE_CHUNK_SIZE = 64 * 1024 * 1024
+
+# Inputs smaller than this are parsed straight from a read-only memory map
+# instead of being copied into memory first; larger ones could exhaust the
+# address space of a 32-bit Python
+MMAP_LIMIT = 2 * 1024 * 1024 * 1024
+
+OUTPUT_NAME = "combined_output.pdf"
+
+# Records which inputs went into the last combined output, so unchanged
+# inputs don't have to be merged again on the next run
+MANIFEST_NAME = ".combined_manifest.json"
+
+
+def _file_signature(path):
+    # Accepts a Path or an os.DirEntry
+    stat = path.stat()
+    return [path.name, stat.st_mtime_ns, stat.st_size]
+
+
+def _load_manifest(manifest_file):
+    try:
+        with open(manifest_file, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    # Treat a manifest of the wrong shape like an unreadable one
+    if not isinstance(manifest, dict) or not isinstance(manifest.get("inputs"), list):
+        return None
+    if not isinstance(manifest.get("failed", []), list):
+        return None
+    return manifest
+
+
+def _save_manifest(manifest_file, input_signatures, failed_signatures, output_file):
+    manifest = {
+        "inputs": input_signatures,
+        # Inputs that couldn't be merged; they're only retried once they change
+        "failed": failed_signatures,
+        "output": _file_signature(output_file),
+    }
+    # Write to a temporary file first so a crash never leaves a partial manifest
+    temp_file = manifest_file.with_name(manifest_file.name + ".tmp")
+    with open(temp_file, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(temp_file, manifest_file)
+
+
+def _open_pdf(path, size, mapped_inputs):
+    # Empty files can't be mapped; let pypdf report them as unreadable
+    if not 0 < size < MMAP_LIMIT:
+        return PdfReader(str(path))
+
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    # The writer may still read from the map until the output is written
+    mapped_inputs.enter_context(mapped)
+    return PdfReader(mapped)
+
+
+def _write_in_memory(merger, output_file):
+    buffer = io.BytesIO()
+    merger.write(buffer)
+
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+    fd = os.open(output_file, flags, 0o644)
+    try:
+        with buffer.getbuffer() as data:
+            offset = 0
+            while offset < len(data):
+                offset += os.write(fd, data[offset : offset + WRITE_CHUNK_SIZE])
+    finally:
+        os.close(fd)
+
 
 def main():
     current_dir = Path(__file__).parent
-    converted_pdfs = []
+    converted_pdfs = set()
 
-    # Get all PDF files (excluding the output file if it exists)
-    all_pdf_files = sorted(current_dir.glob("*.pdf"))
-    pdf_files = [pdf for pdf in all_pdf_files if pdf.name != "combined_output.pdf"]
+    # Get all PDF files (excluding the output file if it exists) in a single
+    # directory scan; DirEntry caches its stat, which the manifest reuses
+    with os.scandir(current_dir) as entries:
+        pdf_entries = [
+            entry
+            for entry in entries
+            if entry.name.lower().endswith(".pdf")
+            and entry.name != OUTPUT_NAME
+            and entry.is_file()
+        ]
+    pdf_entries.sort(key=lambda entry: Path(entry.path))
+    pdf_files = [Path(entry.path) for entry in pdf_entries]
 
     if not pdf_files:
         print("No PDF files found to merge.")
@@ -21,24 +115,98 @@ def main():
         marker = "(converted)" if pdf in converted_pdfs else ""
         print(f"  - {pdf.name} {marker}")
 
-    # Create a PdfWriter object
-    merger = PdfWriter()
-
-    # Append each PDF
-    print("\nMerging PDFs...")
-    for pdf_file in pdf_files:
-        try:
-            reader = PdfReader(str(pdf_file))
-            for page in reader.pages:
-                merger.add_page(page)
-            print(f"  Added: {pdf_file.name}")
-        except Exception as e:
-            print(f"  Error adding {pdf_file.name}: {e}")
-
-    # Write the merged PDF
-    output_file = current_dir / "combined_output.pdf"
-    with open(output_file, "wb") as f:
-        merger.write(f)
+    output_file = current_dir / OUTPUT_NAME
+    manifest_file = current_dir / MANIFEST_NAME
+    signatures = [_file_signature(entry) for entry in pdf_entries]
+
+    # Only trust the manifest if the output is still the one we wrote
+    previous_signatures = []
+    previous_failed = []
+    manifest = _load_manifest(manifest_file)
+    if (
+        manifest
+        and output_file.exists()
+        and manifest.get("output") == _file_signature(output_file)
+    ):
+        previous_signatures = manifest["inputs"]
+        previous_failed = manifest.get("failed", [])
+
+    # Inputs that failed before and haven't changed since would fail again
+    failed_signatures = [sig for sig in signatures if sig in previous_failed]
+    pending = [
+        (pdf, sig)
+        for pdf, sig in zip(pdf_files, signatures)
+        if sig not in previous_failed
+    ]
+
+    if [sig for _, sig in pending] == previous_signatures:
+        print(f"\n{output_file.name} is already up to date.")
+        return
+
+    with ExitStack() as mapped_inputs:
+        print("\nMerging PDFs...")
+        for pdf, sig in zip(pdf_files, signatures):
+            if sig in failed_signatures:
+                print(f"  Skipped: {pdf.name} (failed before and hasn't changed)")
+
+        start = len(previous_signatures)
+        incremental = bool(previous_signatures) and (
+            [sig for _, sig in pending[:start]] == previous_signatures
+        )
+        if incremental:
+            # Only new files were added after the ones already merged
+            try:
+                merger = PdfWriter(clone_from=str(output_file))
+                included_signatures = list(previous_signatures)
+                print(f"  Appending to existing {output_file.name}")
+            except Exception as e:
+                print(f"  Error reading {output_file.name}, rebuilding it: {e}")
+                incremental = False
+
+        if not incremental:
+            merger = PdfWriter()
+            included_signatures = []
+            start = 0
+
+        if not incremental and pending:
+            # Clone the first PDF rather than copying it into an empty writer
+            start = 1
+            first_pdf, first_signature = pending[0]
+            try:
+                first_reader = _open_pdf(first_pdf, first_signature[2], mapped_inputs)
+                merger = PdfWriter(clone_from=first_reader)
+                included_signatures.append(first_signature)
+                print(f"  Added: {first_pdf.name}")
+            except Exception as e:
+                print(f"  Error adding {first_pdf.name}: {e}")
+                failed_signatures.append(first_signature)
+
+        # Append each remaining PDF
+        for pdf_file, signature in pending[start:]:
+            try:
+                merger.append(_open_pdf(pdf_file, signature[2], mapped_inputs))
+                included_signatures.append(signature)
+                print(f"  Added: {pdf_file.name}")
+            except Exception as e:
+                print(f"  Error adding {pdf_file.name}: {e}")
+                failed_signatures.append(signature)
+
+        # Share identical objects (e.g. repeated cover pages or letterhead)
+        # between inputs, and drop anything no longer referenced. This hashes
+        # every object in the document, so it is skipped when only appending
+        # to an existing output; the next full rebuild catches up.
+        if not incremental:
+            merger.compress_identical_objects()
+
+        # Write the merged PDF; its size is roughly the total size of the inputs
+        expected_size = sum(signature[2] for signature in included_signatures)
+        if expected_size < IN_MEMORY_WRITE_LIMIT:
+            _write_in_memory(merger, output_file)
+        else:
+            with open(output_file, "wb", buffering=OUTPUT_BUFFER_SIZE) as f:
+                merger.write(f)
+
+    _save_manifest(manifest_file, included_signatures, failed_signatures, output_file)
 
     print(f"\nSuccessfully combined {len(pdf_files)} PDFs into: {output_file.name}")
 